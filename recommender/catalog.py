@@ -0,0 +1,353 @@
+"""Compact columnar product catalog.
+
+Products are stored column by column instead of as a generic object-dtype
+DataFrame: IDs and names are packed into byte buffers with offsets,
+categories are interned and stored as integer codes, and price/rating are
+float32 arrays. An open-addressing hash table maps product IDs to row indices.
+
+Values that float32 can't represent exactly, and IDs other than strings, ints
+and ObjectIds, are kept as-is on the side so records round-trip unchanged.
+
+Rows are handed out as lightweight ``ProductView`` objects; a JSON-ready dict
+is only built (``to_dict``) for the products that are actually returned.
+"""
+import sys
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+from bson import ObjectId
+
+# Marks a field that was absent from the original document
+_MISSING = object()
+
+_STRING_FIELDS = ("_id", "name")
+_NUMERIC_FIELDS = ("price", "rating")
+_CORE_FIELDS = _STRING_FIELDS + ("category",) + _NUMERIC_FIELDS
+# Bit in _int_flags marking a numeric field whose original value was an int
+_INT_BITS = {field: 1 << bit for bit, field in enumerate(_NUMERIC_FIELDS)}
+
+
+def _pack(encoded):
+    """Pack byte strings into one buffer plus an offsets array."""
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    if encoded:
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def _encode_id(product_id):
+    """Encode an ID as a type-tagged key, so 7 and "7" stay distinct."""
+    if isinstance(product_id, str):
+        return b"s" + product_id.encode("utf-8")
+    if isinstance(product_id, ObjectId):
+        return b"o" + product_id.binary
+    if isinstance(product_id, (int, np.integer)) and not isinstance(product_id, bool):
+        return b"i" + str(int(product_id)).encode("ascii")
+    # Anything else is indexed by its string form; the row keeps the raw value
+    return b"x" + str(product_id).encode("utf-8")
+
+
+def _decode_id(key):
+    tag, payload = key[:1], key[1:]
+    if tag == b"s":
+        return payload.decode("utf-8")
+    if tag == b"o":
+        return ObjectId(payload)
+    return int(payload)
+
+
+def _descending_order(values):
+    """Indices that sort ``values`` highest first with NaNs last.
+
+    Mirrors pandas' ``sort_values(ascending=False)`` (reverse, quicksort,
+    reverse) so products with equal ratings keep the order the DataFrame
+    implementation gave them.
+    """
+    mask = np.isnan(values)
+    idx = np.arange(len(values))
+    non_nans = values[~mask][::-1]
+    non_nan_idx = idx[~mask][::-1]
+    indexer = non_nan_idx[non_nans.argsort(kind="quicksort")][::-1]
+    return np.concatenate([indexer, np.nonzero(mask)[0]])
+
+
+def _fits_float32(value):
+    """Whether a number survives storage as float32 and materialisation."""
+    stored = np.float32(value)
+    if isinstance(value, (int, np.integer)):
+        return bool(np.isfinite(stored)) and int(stored) == value
+    return float(np.format_float_positional(stored)) == float(value)
+
+
+def _hash_key(key):
+    # crc32 rather than hash() so the table stays valid across processes
+    return zlib.crc32(key)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+class ProductView(Mapping):
+    """A read-only mapping view of one catalog row."""
+
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog, index):
+        self._catalog = catalog
+        self._index = index
+
+    @property
+    def index(self):
+        return self._index
+
+    def __getitem__(self, field):
+        value = self._catalog.field(self._index, field)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __iter__(self):
+        return iter(self._catalog.fields(self._index))
+
+    def __len__(self):
+        return len(self._catalog.fields(self._index))
+
+    def __contains__(self, field):
+        return self._catalog.field(self._index, field) is not _MISSING
+
+    def get(self, field, default=None):
+        value = self._catalog.field(self._index, field)
+        return default if value is _MISSING else value
+
+    def to_dict(self):
+        """Materialise the row as a plain, JSON-ready dict."""
+        return self._catalog.record(self._index)
+
+    def __repr__(self):
+        return f"ProductView({self.to_dict()!r})"
+
+
+class ProductCatalog:
+    """Columnar, read-only store for the product collection."""
+
+    def __init__(self, products=None):
+        products = list(products or [])
+        n = len(products)
+
+        ids = []
+        names = []
+        # Values that don't fit the columnar layout, keyed by row index
+        self._extras = {}
+
+        self.categories = []
+        category_codes = {}
+        category = np.full(n, -1, dtype=np.int32)
+        self._numeric = {field: np.full(n, np.nan, dtype=np.float32) for field in _NUMERIC_FIELDS}
+        self._int_flags = np.zeros(n, dtype=np.uint8)
+
+        for i, product in enumerate(products):
+            extras = {}
+
+            product_id = product.get("_id", _MISSING)
+            if product_id is _MISSING or product_id is None:
+                ids.append(b"")
+                extras["_id"] = product_id
+            else:
+                key = _encode_id(product_id)
+                ids.append(key)
+                if key[:1] == b"x":
+                    extras["_id"] = product_id
+
+            name = product.get("name", _MISSING)
+            if isinstance(name, str):
+                names.append(name.encode("utf-8"))
+            else:
+                names.append(b"")
+                extras["name"] = name
+
+            value = product.get("category", _MISSING)
+            if isinstance(value, str):
+                code = category_codes.get(value)
+                if code is None:
+                    code = category_codes[value] = len(self.categories)
+                    self.categories.append(sys.intern(value))
+                category[i] = code
+            else:
+                extras["category"] = value
+
+            for field in _NUMERIC_FIELDS:
+                value = product.get(field, _MISSING)
+                if _is_number(value):
+                    # The float32 column is still used for sorting and filtering
+                    self._numeric[field][i] = value
+                    if isinstance(value, (int, np.integer)):
+                        self._int_flags[i] |= _INT_BITS[field]
+                    if not _fits_float32(value):
+                        extras[field] = value
+                elif value is not _MISSING:
+                    extras[field] = value
+
+            for field, value in product.items():
+                if field not in _CORE_FIELDS:
+                    extras[field] = value
+
+            if extras:
+                self._extras[i] = extras
+
+        self._category_codes = category_codes
+        # Codes only need to be as wide as the number of distinct categories
+        self._category = category.astype(np.int16 if len(self.categories) < 2**15 else np.int32)
+        self._ids, self._id_offsets = _pack(ids)
+        self._names, self._name_offsets = _pack(names)
+        self._build_index()
+
+        # Rating order is fixed for the catalog's lifetime, so sort once
+        self._by_rating = _descending_order(self._numeric["rating"]).astype(np.int32)
+        self.has_ratings = bool(n) and not np.isnan(self._numeric["rating"]).all()
+
+    def _build_index(self):
+        n = len(self)
+        # ~2/3 load factor keeps linear probe chains short without a 2x table
+        self._size = max(8, n * 3 // 2 + 1)
+        self._table = np.full(self._size, -1, dtype=np.int32)
+
+        for i in range(n):
+            key = self._id_bytes(i)
+            slot = _hash_key(key) % self._size
+            while self._table[slot] != -1:
+                if self._id_bytes(self._table[slot]) == key:
+                    break  # Duplicate ID: the first row wins
+                slot = (slot + 1) % self._size
+            else:
+                self._table[slot] = i
+
+    def _id_bytes(self, index):
+        return self._ids[self._id_offsets[index]:self._id_offsets[index + 1]]
+
+    def __len__(self):
+        return len(self._id_offsets) - 1
+
+    def __iter__(self):
+        return (ProductView(self, i) for i in range(len(self)))
+
+    def __contains__(self, product_id):
+        return self.index_of(product_id) is not None
+
+    def index_of(self, product_id):
+        """Return the row index for a product ID, or None if it isn't in the catalog."""
+        if product_id is None:
+            return None
+        key = _encode_id(product_id)
+        slot = _hash_key(key) % self._size
+        while True:
+            index = self._table[slot]
+            if index == -1:
+                return None
+            if self._id_bytes(index) == key:
+                return int(index)
+            slot = (slot + 1) % self._size
+
+    def get(self, product_id):
+        """Return a view of the product with the given ID, or None."""
+        index = self.index_of(product_id)
+        return None if index is None else ProductView(self, index)
+
+    def view(self, index):
+        return ProductView(self, index)
+
+    def field(self, index, field):
+        """Return a single field of a row, or _MISSING if the row lacks it."""
+        extras = self._extras.get(index)
+        if extras is not None and field in extras:
+            return extras[field]
+
+        if field == "_id":
+            return _decode_id(self._id_bytes(index))
+        if field == "name":
+            start, end = self._name_offsets[index], self._name_offsets[index + 1]
+            return self._names[start:end].decode("utf-8")
+        if field == "category":
+            return self.categories[self._category[index]]
+        if field in self._numeric:
+            value = self._numeric[field][index]
+            if np.isnan(value):
+                return _MISSING
+            if self._int_flags[index] & _INT_BITS[field]:
+                return int(value)
+            # Shortest repr that round-trips the float32 (4.8, not 4.800000190734863)
+            return float(np.format_float_positional(value))
+        return _MISSING
+
+    def fields(self, index):
+        """Names of the fields present in a row, in record order."""
+        extras = self._extras.get(index, {})
+        names = []
+        for field in _CORE_FIELDS:
+            if field in extras:
+                if extras[field] is not _MISSING:
+                    names.append(field)
+            elif field not in self._numeric or not np.isnan(self._numeric[field][index]):
+                names.append(field)
+        names.extend(
+            field
+            for field, value in extras.items()
+            if field not in _CORE_FIELDS and value is not _MISSING
+        )
+        return names
+
+    def record(self, index):
+        """Build a JSON-ready dict for one row."""
+        record = {}
+        for field in _CORE_FIELDS:
+            value = self.field(index, field)
+            if value is not _MISSING:
+                record[field] = value
+        extras = self._extras.get(index)
+        if extras:
+            for field, value in extras.items():
+                if value is _MISSING:
+                    record.pop(field, None)
+                else:
+                    record[field] = value
+        return record
+
+    def category_mask(self, categories):
+        """Boolean mask of rows whose category is one of ``categories``."""
+        codes = [self._category_codes[c] for c in categories if c in self._category_codes]
+        return np.isin(self._category, codes)
+
+    def id_mask(self, product_ids):
+        """Boolean mask of rows whose ID is in ``product_ids``."""
+        mask = np.zeros(len(self), dtype=bool)
+        for product_id in product_ids:
+            index = self.index_of(product_id)
+            if index is not None:
+                mask[index] = True
+        return mask
+
+    def by_rating(self, mask=None):
+        """Row indices sorted by rating (highest first), optionally filtered.
+
+        A filtered subset is sorted on its own rather than sliced out of the
+        full order, since an unstable sort orders ties differently per subset.
+        """
+        if mask is None:
+            return self._by_rating
+        indices = np.flatnonzero(mask)
+        return indices[_descending_order(self._numeric["rating"][indices])]
+
+    def memory_usage(self):
+        """Approximate memory footprint of the catalog in bytes."""
+        total = len(self._ids) + len(self._names)
+        total += self._id_offsets.nbytes + self._name_offsets.nbytes
+        total += self._category.nbytes + self._table.nbytes + self._by_rating.nbytes
+        total += sum(column.nbytes for column in self._numeric.values())
+        total += self._int_flags.nbytes
+        total += sum(sys.getsizeof(category) for category in self.categories)
+        total += sum(
+            sys.getsizeof(extras) + sum(sys.getsizeof(value) for value in extras.values())
+            for extras in self._extras.values()
+        )
+        return total
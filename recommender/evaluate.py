@@ -0,0 +1,337 @@
+"""Offline evaluation harness for the recommendation engine.
+
+Replays a time-split of the interactions collection: the engine is built from
+the older interactions and asked for recommendations for every user that has
+newer ones. Quality (precision@k, recall@k, NDCG@k, catalog coverage) is
+reported together with per-user latency percentiles and throughput, and two
+engine configurations can be compared side by side in a single run.
+
+An engine is given as "module:Class". The class must provide a
+``from_records(products, users, interactions)`` classmethod that builds an
+engine from in-memory documents (see ``RecommendationEngine.from_records``).
+
+When ``--data`` is given on the command line, ``main`` sets
+RECOMMENDER_OFFLINE=1 so importing the engine module doesn't try to reach
+MongoDB.
+
+Usage (from the repository root):
+    python -m recommender.evaluate --data mongodb/init_data.json --k 5
+    python -m recommender.evaluate --candidate mymodule:FasterEngine
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ENGINE = "recommender.recommender:RecommendationEngine"
+
+# Engine instance owned by the current worker process
+_worker_engine = None
+
+
+def load_engine_class(spec):
+    """Resolve an engine spec of the form "package.module:ClassName"."""
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Engine spec must look like 'module:Class', got {spec!r}")
+    module = importlib.import_module(module_name)
+    engine_class = getattr(module, class_name)
+    if not callable(getattr(engine_class, "from_records", None)):
+        raise ValueError(
+            f"Engine {spec!r} must define a from_records(products, users, interactions) classmethod"
+        )
+    return engine_class
+
+
+def load_dataset(path=None):
+    """Load products, users and interactions from a JSON dump or MongoDB.
+
+    The JSON file uses the same layout as mongodb/init_data.json.
+    """
+    if path:
+        with open(path) as f:
+            data = json.load(f)
+        return data["products"], data["users"], data["interactions"]
+
+    from recommender.recommender import db
+
+    if db is None:
+        raise RuntimeError("Database connection not available; pass --data instead.")
+    return (
+        list(db.products.find()),
+        list(db.users.find()),
+        list(db.interactions.find()),
+    )
+
+
+def time_split(interactions, train_ratio=0.8):
+    """Split interactions by timestamp into (train, test_relevant).
+
+    The oldest ``train_ratio`` of interactions form the training set. For each
+    user, the products they interacted with in the remaining interactions, and
+    not already in training, are the relevant items for evaluation.
+    """
+    if not interactions:
+        return [], {}
+
+    df = pd.DataFrame(interactions)
+    if "timestamp" in df.columns:
+        df["_ts"] = pd.to_datetime(df["timestamp"], errors="coerce")
+        df = df.sort_values("_ts", kind="stable", na_position="first")
+        df = df.drop(columns="_ts")
+
+    cutoff = int(len(df) * train_ratio)
+    train_df = df.iloc[:cutoff]
+    test_df = df.iloc[cutoff:]
+
+    train_pairs = set(zip(train_df["user_id"], train_df["product_id"]))
+    relevant = {}
+    for user_id, product_id in zip(test_df["user_id"], test_df["product_id"]):
+        if (user_id, product_id) not in train_pairs:
+            relevant.setdefault(user_id, set()).add(product_id)
+
+    # Hand back plain documents so the engine sees the same shape as Mongo
+    return train_df.to_dict("records"), relevant
+
+
+def precision_at_k(recommended, relevant, k):
+    if k <= 0:
+        return 0.0
+    hits = sum(1 for product_id in recommended[:k] if product_id in relevant)
+    return hits / k
+
+
+def recall_at_k(recommended, relevant, k):
+    if not relevant:
+        return 0.0
+    hits = sum(1 for product_id in recommended[:k] if product_id in relevant)
+    return hits / len(relevant)
+
+
+def ndcg_at_k(recommended, relevant, k):
+    """Binary-relevance NDCG over the top k recommendations."""
+    if not relevant:
+        return 0.0
+    dcg = sum(
+        1.0 / math.log2(rank + 2)
+        for rank, product_id in enumerate(recommended[:k])
+        if product_id in relevant
+    )
+    ideal = sum(1.0 / math.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    return dcg / ideal
+
+
+def _init_worker(engine_spec, products, users, interactions):
+    """Build one engine per worker process from the training split."""
+    global _worker_engine
+    engine_class = load_engine_class(engine_spec)
+    _worker_engine = engine_class.from_records(products, users, interactions)
+
+
+def _recommend_batch(users, k):
+    """Generate recommendations for a batch of (user_id, seed) pairs, timing each call."""
+    results = []
+    for user_id, user_seed in users:
+        # The engine fills remaining slots with a random shuffle. A distinct but
+        # fixed seed per user keeps runs and configurations comparable without
+        # giving every cold user the same shuffled list
+        np.random.seed(user_seed)
+        start = time.perf_counter()
+        recommendations = _worker_engine.get_recommended_products(user_id, k)
+        latency_ms = (time.perf_counter() - start) * 1000
+        product_ids = [product["_id"] for product in recommendations]
+        results.append((user_id, product_ids, latency_ms))
+    return results
+
+
+def _chunks(items, n_chunks):
+    size = max(1, math.ceil(len(items) / max(1, n_chunks)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def evaluate_engine(engine_spec, products, users, train, relevant, k=5, workers=1, seed=42):
+    """Replay the test users through one engine configuration.
+
+    Returns a dict with the averaged quality metrics, latency percentiles in
+    milliseconds, throughput in users per second and the per-user
+    recommendations keyed by user ID.
+    """
+    user_ids = sorted(relevant)
+    users_with_seeds = [(user_id, seed + i) for i, user_id in enumerate(user_ids)]
+    init_args = (engine_spec, products, users, train)
+    # Import the engine module up front so forked workers inherit it instead of
+    # each re-running its module-level setup inside the timed region
+    load_engine_class(engine_spec)
+
+    start = time.perf_counter()
+    if workers <= 1:
+        _init_worker(*init_args)
+        batches = [_recommend_batch(users_with_seeds, k)]
+    else:
+        # Several batches per worker so a slow user doesn't stall a whole core
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=init_args
+        ) as executor:
+            futures = [
+                executor.submit(_recommend_batch, batch, k)
+                for batch in _chunks(users_with_seeds, workers * 4)
+            ]
+            batches = [future.result() for future in futures]
+    # Wall-clock time includes building the engine in each worker
+    elapsed = time.perf_counter() - start
+
+    recommendations = {}
+    latencies = []
+    for batch in batches:
+        for user_id, product_ids, latency_ms in batch:
+            recommendations[user_id] = product_ids
+            latencies.append(latency_ms)
+
+    precision = [precision_at_k(recommendations[u], relevant[u], k) for u in user_ids]
+    recall = [recall_at_k(recommendations[u], relevant[u], k) for u in user_ids]
+    ndcg = [ndcg_at_k(recommendations[u], relevant[u], k) for u in user_ids]
+
+    catalog_ids = {product["_id"] for product in products}
+    recommended_ids = {
+        product_id for product_ids in recommendations.values() for product_id in product_ids
+    }
+
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    else:
+        p50 = p95 = p99 = 0.0
+
+    return {
+        "engine": engine_spec,
+        "users": len(user_ids),
+        f"precision@{k}": float(np.mean(precision)) if precision else 0.0,
+        f"recall@{k}": float(np.mean(recall)) if recall else 0.0,
+        f"ndcg@{k}": float(np.mean(ndcg)) if ndcg else 0.0,
+        "coverage": len(recommended_ids & catalog_ids) / len(catalog_ids) if catalog_ids else 0.0,
+        "latency_p50_ms": float(p50),
+        "latency_p95_ms": float(p95),
+        "latency_p99_ms": float(p99),
+        "throughput_users_per_s": len(user_ids) / elapsed if elapsed > 0 else 0.0,
+        "recommendations": recommendations,
+    }
+
+
+def compare_recommendations(baseline, candidate):
+    """Measure how much a candidate's recommendations differ from a baseline."""
+    user_ids = sorted(set(baseline) & set(candidate))
+    if not user_ids:
+        return {"identical_lists": 0.0, "mean_jaccard": 0.0}
+
+    identical = 0
+    jaccard = []
+    for user_id in user_ids:
+        a, b = baseline[user_id], candidate[user_id]
+        if a == b:
+            identical += 1
+        union = set(a) | set(b)
+        jaccard.append(len(set(a) & set(b)) / len(union) if union else 1.0)
+
+    return {
+        "identical_lists": identical / len(user_ids),
+        "mean_jaccard": float(np.mean(jaccard)),
+    }
+
+
+def run_evaluation(
+    data_path=None,
+    baseline=DEFAULT_ENGINE,
+    candidate=None,
+    k=5,
+    train_ratio=0.8,
+    workers=1,
+    seed=42,
+):
+    """Evaluate the baseline (and optionally a candidate) on one time split."""
+    products, users, interactions = load_dataset(data_path)
+    train, relevant = time_split(interactions, train_ratio)
+    print(
+        f"Split {len(interactions)} interactions: {len(train)} train, "
+        f"{len(relevant)} test users"
+    )
+
+    report = {
+        "k": k,
+        "train_ratio": train_ratio,
+        "baseline": evaluate_engine(baseline, products, users, train, relevant, k, workers, seed),
+    }
+    if candidate:
+        report["candidate"] = evaluate_engine(
+            candidate, products, users, train, relevant, k, workers, seed
+        )
+        report["agreement"] = compare_recommendations(
+            report["baseline"]["recommendations"],
+            report["candidate"]["recommendations"],
+        )
+    return report
+
+
+def format_report(report):
+    """Render a report as a plain-text table."""
+    columns = [name for name in ("baseline", "candidate") if name in report]
+    rows = [
+        key
+        for key, value in report["baseline"].items()
+        if key not in ("engine", "recommendations")
+    ]
+
+    lines = [f"{'metric':<24}" + "".join(f"{name:>16}" for name in columns)]
+    for row in rows:
+        cells = []
+        for name in columns:
+            value = report[name][row]
+            cells.append(f"{value:>16.4f}" if isinstance(value, float) else f"{value:>16}")
+        lines.append(f"{row:<24}" + "".join(cells))
+
+    if "agreement" in report:
+        lines.append("")
+        for key, value in report["agreement"].items():
+            lines.append(f"{key:<24}{value:>16.4f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline evaluation of recommendation engines")
+    parser.add_argument("--data", help="JSON dump to evaluate on (default: read from MongoDB)")
+    parser.add_argument("--baseline", default=DEFAULT_ENGINE, help="Engine spec 'module:Class'")
+    parser.add_argument("--candidate", help="Second engine spec to compare against the baseline")
+    parser.add_argument("--k", type=int, default=5, help="Number of recommendations per user")
+    parser.add_argument("--train-ratio", type=float, default=0.8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the full report (with recommendations) as JSON")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        # Set before any engine module is imported; spawned workers inherit it
+        os.environ["RECOMMENDER_OFFLINE"] = "1"
+
+    report = run_evaluation(
+        data_path=args.data,
+        baseline=args.baseline,
+        candidate=args.candidate,
+        k=args.k,
+        train_ratio=args.train_ratio,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
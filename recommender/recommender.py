@@ -7,6 +7,11 @@ from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from bson import json_util
 from collections import Counter
 import time
+try:
+    from .catalog import ProductCatalog
+except ImportError:
+    # Running as a top-level module (e.g. inside the Docker image)
+    from catalog import ProductCatalog
 
 # Import necessary libraries for your chosen recommendation algorithm (e.g., scikit-learn)
 
@@ -16,12 +21,18 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://mongodb:27017/mydatabase")
 # For local development, you can use: mongodb://localhost:27017/mydatabase
 # For Docker or cloud deployment: mongodb://mongodb:27017/mydatabase (service name)
 
+# Set RECOMMENDER_OFFLINE=1 to skip connecting (e.g. offline evaluation on a JSON dump)
+OFFLINE = os.getenv("RECOMMENDER_OFFLINE", "").lower() in ("1", "true", "yes")
+
 # Add retry logic for MongoDB connection
-max_retries = 30
+max_retries = 0 if OFFLINE else 30
 retry_interval = 2
 client = None
 db = None
 
+if OFFLINE:
+    print("RECOMMENDER_OFFLINE is set. Skipping MongoDB connection.")
+
 for attempt in range(max_retries):
     try:
         print(f"Attempting to connect to MongoDB at {MONGO_URI} (attempt {attempt+1}/{max_retries})")
@@ -46,43 +57,51 @@ def parse_json(data):
 
 
 class RecommendationEngine:
-    def __init__(self):
-        self.products_df = None
+    def __init__(self, products=None, users=None, interactions=None):
+        """Load from MongoDB, or from the given documents if any are passed"""
+        self.catalog = None
         self.users_df = None
         self.interactions_df = None
-        self.load_data()
+        if products is None and users is None and interactions is None:
+            self.load_data()
+        else:
+            self.set_data(products, users, interactions)
 
     def load_data(self):
         """Load data from MongoDB into pandas DataFrames"""
         if db is None:
             print("Database connection not available. Using empty DataFrames.")
-            self.products_df = pd.DataFrame()
+            self.catalog = ProductCatalog()
             self.users_df = pd.DataFrame()
             self.interactions_df = pd.DataFrame()
             return
         
         try:
-            # Load products
             products = list(db.products.find())
-            self.products_df = pd.DataFrame(products) if products else pd.DataFrame()
-
-            # Load users
             users = list(db.users.find())
-            self.users_df = pd.DataFrame(users) if users else pd.DataFrame()
-
-            # Load interactions
             interactions = list(db.interactions.find())
-            self.interactions_df = pd.DataFrame(interactions) if interactions else pd.DataFrame()
+            self.set_data(products, users, interactions)
 
             print(
-            f"Loaded {len(self.products_df)} products, {len(self.users_df)} users, {len(self.interactions_df)} interactions"
+            f"Loaded {len(self.catalog)} products, {len(self.users_df)} users, {len(self.interactions_df)} interactions"
             )
         except Exception as e:
             print(f"Error loading data from MongoDB: {e}")
-            self.products_df = pd.DataFrame()
+            self.catalog = ProductCatalog()
             self.users_df = pd.DataFrame()
             self.interactions_df = pd.DataFrame()
 
+    def set_data(self, products, users, interactions):
+        """Build the product catalog and DataFrames from lists of raw documents"""
+        self.catalog = ProductCatalog(products)
+        self.users_df = pd.DataFrame(users) if users else pd.DataFrame()
+        self.interactions_df = pd.DataFrame(interactions) if interactions else pd.DataFrame()
+
+    @classmethod
+    def from_records(cls, products, users, interactions):
+        """Create an engine from in-memory documents instead of MongoDB"""
+        return cls(products, users, interactions)
+
     def get_user_preferences(self, user_id):
         """Get a user's preferences"""
         user = self.users_df[self.users_df["_id"] == user_id]
@@ -101,24 +120,24 @@ class RecommendationEngine:
         return user_interactions["product_id"].tolist()
 
     def get_category_products(self, categories, exclude_product_ids=None):
-        """Get products from specific categories, excluding any in the exclude list"""
+        """Get products from specific categories, excluding any in the exclude list
+
+        Returns catalog views sorted by rating. They behave like read-only
+        dicts; call ``to_dict()`` on the ones you need as a plain dict.
+        """
         if exclude_product_ids is None:
             exclude_product_ids = []
 
-        if self.products_df is None or self.products_df.empty:
+        if self.catalog is None or len(self.catalog) == 0:
             return []
 
         # Filter by category and exclude already interacted products
-        filtered_df = self.products_df[
-            (self.products_df["category"].isin(categories))
-            & (~self.products_df["_id"].isin(exclude_product_ids))
-        ]
-
-        # Sort by rating if available, otherwise by price (descending)
-        if "rating" in filtered_df.columns:
-            filtered_df = filtered_df.sort_values("rating", ascending=False)
+        mask = self.catalog.category_mask(categories) & ~self.catalog.id_mask(
+            exclude_product_ids
+        )
 
-        return filtered_df.to_dict("records")
+        # Sorted by rating (descending), products without a rating last
+        return [self.catalog.view(i) for i in self.catalog.by_rating(mask).tolist()]
 
     def get_similar_users(self, user_id, n=2):
         """Find similar users based on preferences and interactions"""
@@ -194,19 +213,23 @@ class RecommendationEngine:
             if product_id not in interacted_product_ids
         ]
 
-        # Get full product details
+        # Look up the products, keeping catalog order
         if most_common_products:
-            similar_user_recommendations = [
-                product
-                for product in self.products_df.to_dict("records")
-                if product["_id"] in most_common_products
-            ]
+            indices = sorted(
+                index
+                for index in map(self.catalog.index_of, set(most_common_products))
+                if index is not None
+            )
+            similar_user_recommendations = [self.catalog.view(i) for i in indices]
 
         # Combine recommendations, prioritizing similar user recommendations
         combined_recommendations = []
+        # Row indices already picked, for O(1) duplicate checks
+        combined_indices = set()
 
         # Add similar users recommendations first (more personalized)
         combined_recommendations.extend(similar_user_recommendations)
+        combined_indices.update(product.index for product in similar_user_recommendations)
 
         # Add category recommendations next
         remaining_slots = n_recommendations - len(combined_recommendations)
@@ -216,40 +239,39 @@ class RecommendationEngine:
             for product in category_recommendations:
                 if added >= remaining_slots:
                     break
-                # Check if product is already in combined_recommendations
-                if not any(
-                    r["_id"] == product["_id"] for r in combined_recommendations
-                ):
+                if product.index not in combined_indices:
                     combined_recommendations.append(product)
+                    combined_indices.add(product.index)
                     added += 1
 
         # If still not enough, add popular products (mix rating and random)
         remaining_slots = n_recommendations - len(combined_recommendations)
         if remaining_slots > 0:
-            if "rating" in self.products_df.columns:
-                popular_df = self.products_df.copy()
-
-                # Mix top-rated + random shuffle 
-                popular_df = popular_df.sort_values("rating", ascending=False)
-
-
-                cutoff = int(len(popular_df) * 0.8)
-                candidate_products = popular_df.iloc[:cutoff].sample(frac=1).to_dict("records")
+            if self.catalog.has_ratings:
+                # Mix top-rated + random shuffle
+                popular = self.catalog.by_rating()
+                cutoff = int(len(popular) * 0.8)
+                candidate_indices = popular[:cutoff][np.random.permutation(cutoff)]
             else:
-                candidate_products = self.products_df.sample(frac=1).to_dict("records")
+                candidate_indices = np.random.permutation(len(self.catalog))
+
+            interacted_indices = set(
+                map(self.catalog.index_of, interacted_product_ids)
+            )
 
             added = 0
-            for product in candidate_products:
+            for index in candidate_indices.tolist():
                 if added >= remaining_slots:
                     break
-                if (
-                    not any(r["_id"] == product["_id"] for r in combined_recommendations)
-                    and product["_id"] not in interacted_product_ids
-                ):
-                    combined_recommendations.append(product)
+                if index not in combined_indices and index not in interacted_indices:
+                    combined_recommendations.append(self.catalog.view(index))
+                    combined_indices.add(index)
                     added += 1
 
-        return combined_recommendations[:n_recommendations]
+        # Only materialise records for the products actually returned
+        return [
+            product.to_dict() for product in combined_recommendations[:n_recommendations]
+        ]
 
 
 # Instantiate the recommendation engine
@@ -0,0 +1,114 @@
+import pandas as pd
+import numpy as np
+from bson import ObjectId
+from recommender.catalog import ProductCatalog, ProductView
+
+PRODUCTS = [
+    {"_id": "p1", "name": "Phone", "category": "Electronics", "rating": 4.5, "price": 500},
+    {"_id": "p2", "name": "Book", "category": "Books", "rating": 4.8, "price": 19.99},
+    {"_id": "p3", "name": "Headphones", "category": "Electronics", "rating": 4.2, "price": 150},
+    {"_id": "p4", "name": "Mystery Box", "category": "Toys", "price": 5, "stock": 3},
+]
+
+
+def test_lookup_by_id():
+    catalog = ProductCatalog(PRODUCTS)
+    assert len(catalog) == 4
+    assert catalog.index_of("p3") == 2
+    assert catalog.index_of("missing") is None
+    assert "p2" in catalog
+    assert catalog.get("p1")["name"] == "Phone"
+
+def test_records_round_trip():
+    catalog = ProductCatalog(PRODUCTS)
+    assert [product.to_dict() for product in catalog] == PRODUCTS
+
+def test_view_is_slotted():
+    view = ProductCatalog(PRODUCTS).get("p4")
+    assert isinstance(view, ProductView)
+    assert not hasattr(view, "__dict__")
+    assert view.get("rating") is None
+    assert view["stock"] == 3
+
+def test_view_is_a_mapping():
+    catalog = ProductCatalog(PRODUCTS)
+    view = catalog.get("p4")
+    assert "stock" in view
+    assert "rating" not in view
+    assert dict(view) == PRODUCTS[3]
+    assert list(view.items()) == list(PRODUCTS[3].items())
+    assert len(view) == 5
+    assert view == PRODUCTS[3]
+    assert all(dict(product) == product.to_dict() for product in catalog)
+
+def test_category_and_id_masks():
+    catalog = ProductCatalog(PRODUCTS)
+    mask = catalog.category_mask(["Electronics", "Unknown"]) & ~catalog.id_mask(["p1"])
+    assert mask.tolist() == [False, False, True, False]
+
+def test_by_rating_puts_unrated_last():
+    catalog = ProductCatalog(PRODUCTS)
+    assert catalog.by_rating().tolist() == [1, 0, 2, 3]
+    assert catalog.has_ratings
+
+def test_non_string_ids():
+    oid = ObjectId()
+    catalog = ProductCatalog([
+        {"_id": 7, "name": "Lamp", "category": "Home"},
+        {"_id": "7", "name": "Rug", "category": "Home"},
+        {"_id": oid, "name": "Desk", "category": "Furniture"},
+        {"_id": 2.5, "name": "Odd", "category": "Home"},
+    ])
+    # IDs of different types never collide
+    assert catalog.index_of(7) == 0
+    assert catalog.index_of("7") == 1
+    assert catalog.index_of(oid) == 2
+    assert catalog.index_of(str(oid)) is None
+    assert catalog.get(oid)["_id"] == oid
+    assert catalog.get(2.5)["_id"] == 2.5
+    assert catalog.get(7).to_dict() == {"_id": 7, "name": "Lamp", "category": "Home"}
+
+def test_numbers_float32_cannot_hold_are_kept_exactly():
+    products = [
+        {"_id": "big", "name": "Yacht", "category": "Boats", "price": 1234567.89, "rating": 4.5},
+        {"_id": "int", "name": "Plane", "category": "Planes", "price": 16777217, "rating": 5},
+        {"_id": "ok", "name": "Kayak", "category": "Boats", "price": 19.99, "rating": 3.7},
+    ]
+    catalog = ProductCatalog(products)
+    assert [product.to_dict() for product in catalog] == products
+    assert catalog.get("big")["price"] == 1234567.89
+    assert catalog.get("int")["price"] == 16777217
+
+def test_empty_catalog():
+    catalog = ProductCatalog()
+    assert len(catalog) == 0
+    assert catalog.index_of("p1") is None
+    assert not catalog.has_ratings
+
+def _synthetic_products(make_id, n=5000):
+    rng = np.random.default_rng(0)
+    categories = ["Electronics", "Books", "Home Goods", "Furniture", "Stationery", "Toys"]
+    return [
+        {
+            "_id": make_id(i),
+            "name": f"Product number {i}",
+            "category": categories[i % len(categories)],
+            "price": round(float(rng.uniform(1, 2000)), 2),
+            "rating": round(float(rng.uniform(1, 5)), 1),
+        }
+        for i in range(n)
+    ]
+
+def test_memory_smaller_than_dataframe():
+    products = _synthetic_products(lambda i: f"prod{i}")
+    df_bytes = pd.DataFrame(products).memory_usage(deep=True).sum()
+    catalog = ProductCatalog(products)
+    assert df_bytes / catalog.memory_usage() >= 3
+    assert catalog.get("prod4321").to_dict() == products[4321]
+
+def test_memory_smaller_than_dataframe_with_object_ids():
+    products = _synthetic_products(lambda i: ObjectId())
+    df_bytes = pd.DataFrame(products).memory_usage(deep=True).sum()
+    catalog = ProductCatalog(products)
+    assert df_bytes / catalog.memory_usage() >= 3
+    assert catalog.get(products[1234]["_id"]).to_dict() == products[1234]
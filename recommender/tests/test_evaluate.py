@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+import recommender.evaluate as evaluate
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENGINE = "recommender.recommender:RecommendationEngine"
+
+PRODUCTS = [
+    {"_id": "p1", "name": "Phone", "category": "Electronics", "rating": 4.5, "price": 500},
+    {"_id": "p2", "name": "Book", "category": "Books", "rating": 4.8, "price": 20},
+    {"_id": "p3", "name": "Headphones", "category": "Electronics", "rating": 4.2, "price": 150},
+    {"_id": "p4", "name": "Notebook", "category": "Books", "rating": 3.9, "price": 5},
+]
+USERS = [
+    {"_id": "user1", "preferences": ["Electronics"]},
+    {"_id": "user2", "preferences": ["Books"]},
+]
+INTERACTIONS = [
+    {"user_id": "user1", "product_id": "p1", "timestamp": "2023-05-01"},
+    {"user_id": "user2", "product_id": "p2", "timestamp": "2023-05-02"},
+    {"user_id": "user1", "product_id": "p3", "timestamp": "2023-05-03"},
+    {"user_id": "user2", "product_id": "p4", "timestamp": "2023-05-04"},
+    {"user_id": "user2", "product_id": "p2", "timestamp": "2023-05-05"},
+]
+
+
+def test_time_split_orders_by_timestamp():
+    train, relevant = evaluate.time_split(list(reversed(INTERACTIONS)), train_ratio=0.4)
+    assert [i["product_id"] for i in train] == ["p1", "p2"]
+    # Repeat interactions already seen in training are not counted as relevant
+    assert relevant == {"user1": {"p3"}, "user2": {"p4"}}
+
+def test_time_split_empty():
+    assert evaluate.time_split([]) == ([], {})
+
+def test_ranking_metrics():
+    recommended = ["a", "b", "c"]
+    relevant = {"b", "d"}
+    assert evaluate.precision_at_k(recommended, relevant, 2) == 0.5
+    assert evaluate.recall_at_k(recommended, relevant, 3) == 0.5
+    assert evaluate.ndcg_at_k(["b", "d"], relevant, 2) == pytest.approx(1.0)
+    assert 0 < evaluate.ndcg_at_k(recommended, relevant, 3) < 1
+    assert evaluate.recall_at_k(recommended, set(), 3) == 0.0
+
+def test_load_engine_class_rejects_bad_spec():
+    with pytest.raises(ValueError):
+        evaluate.load_engine_class("recommender.recommender")
+
+def test_load_engine_class_requires_from_records():
+    with pytest.raises(ValueError, match="from_records"):
+        evaluate.load_engine_class("json:JSONDecoder")
+
+def test_evaluate_engine_reports_quality_and_latency():
+    train, relevant = evaluate.time_split(INTERACTIONS, train_ratio=0.4)
+    result = evaluate.evaluate_engine(ENGINE, PRODUCTS, USERS, train, relevant, k=2)
+    assert result["users"] == 2
+    assert 0.0 <= result["precision@2"] <= 1.0
+    assert 0.0 < result["coverage"] <= 1.0
+    assert result["latency_p50_ms"] <= result["latency_p99_ms"]
+    assert set(result["recommendations"]) == {"user1", "user2"}
+
+def test_evaluate_engine_process_pool_matches_inline():
+    train, relevant = evaluate.time_split(INTERACTIONS, train_ratio=0.4)
+    inline = evaluate.evaluate_engine(ENGINE, PRODUCTS, USERS, train, relevant, k=2)
+    pooled = evaluate.evaluate_engine(ENGINE, PRODUCTS, USERS, train, relevant, k=2, workers=2)
+    assert pooled["recommendations"] == inline["recommendations"]
+
+def test_cold_users_get_distinct_fallback_lists():
+    products = [
+        {"_id": f"c{i}", "name": f"Item {i}", "category": "Misc", "rating": 3.0 + i % 5 * 0.4}
+        for i in range(20)
+    ]
+    # No preferences and no training history, so both rely on the popular shuffle
+    users = [{"_id": "cold1", "preferences": []}, {"_id": "cold2", "preferences": []}]
+    relevant = {"cold1": {"c0"}, "cold2": {"c1"}}
+    inline = evaluate.evaluate_engine(ENGINE, products, users, [], relevant, k=5)
+    pooled = evaluate.evaluate_engine(ENGINE, products, users, [], relevant, k=5, workers=2)
+    assert inline["recommendations"]["cold1"] != inline["recommendations"]["cold2"]
+    assert pooled["recommendations"] == inline["recommendations"]
+
+def test_run_evaluation_compares_configurations(tmp_path, monkeypatch):
+    monkeypatch.setenv("RECOMMENDER_OFFLINE", "1")
+    data_path = tmp_path / "data.json"
+    data_path.write_text(
+        json.dumps({"products": PRODUCTS, "users": USERS, "interactions": INTERACTIONS})
+    )
+    report = evaluate.run_evaluation(
+        data_path=str(data_path), baseline=ENGINE, candidate=ENGINE, k=2, train_ratio=0.4
+    )
+    assert report["agreement"]["identical_lists"] == 1.0
+    assert "candidate" in evaluate.format_report(report)
+
+def test_main_with_data_skips_database(tmp_path):
+    data_path = tmp_path / "data.json"
+    data_path.write_text(
+        json.dumps({"products": PRODUCTS, "users": USERS, "interactions": INTERACTIONS})
+    )
+    # An explicit RECOMMENDER_OFFLINE=0 must not bring back the retry loop
+    env = dict(
+        os.environ, MONGO_URI="mongodb://127.0.0.1:1/unreachable", RECOMMENDER_OFFLINE="0"
+    )
+    script = (
+        "import recommender.evaluate as e; "
+        f"e.main(['--data', {str(data_path)!r}, '--k', '2', '--train-ratio', '0.4', '--workers', '2'])"
+    )
+    # Without the offline switch the import alone would retry MongoDB for minutes
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, env=env, timeout=60,
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Attempting to connect to MongoDB" not in result.stdout
+
+def test_run_evaluation_leaves_environment_alone(tmp_path, monkeypatch):
+    monkeypatch.delenv("RECOMMENDER_OFFLINE", raising=False)
+    data_path = tmp_path / "data.json"
+    data_path.write_text(
+        json.dumps({"products": PRODUCTS, "users": USERS, "interactions": INTERACTIONS})
+    )
+    evaluate.run_evaluation(data_path=str(data_path), k=2, train_ratio=0.4)
+    assert "RECOMMENDER_OFFLINE" not in os.environ
@@ -1,7 +1,16 @@
+import json
+import os
+import numpy as np
+import pandas as pd
 import pytest
+from collections import Counter
 from unittest.mock import patch, MagicMock
 import recommender.recommender as recommender_module
 
+INIT_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "mongodb", "init_data.json"
+)
+
 
 @pytest.fixture
 def mock_db():
@@ -27,7 +36,7 @@ def engine(mock_db):
     return recommender_module.RecommendationEngine()
 
 def test_load_data(engine):
-    assert len(engine.products_df) == 3
+    assert len(engine.catalog) == 3
     assert len(engine.users_df) == 2
     assert len(engine.interactions_df) == 2
 
@@ -43,6 +52,13 @@ def test_get_category_products(engine):
     products = engine.get_category_products(["Electronics"])
     assert all(p["category"] == "Electronics" for p in products)
 
+def test_get_category_products_behave_like_dicts(engine):
+    products = engine.get_category_products(["Books"])
+    assert "rating" in products[0]
+    assert dict(products[0]) == {
+        "_id": "p2", "name": "Book", "category": "Books", "price": 20, "rating": 4.8
+    }
+
 def test_get_similar_users(engine):
     similar_users = engine.get_similar_users("user1")
     assert isinstance(similar_users, list)
@@ -87,4 +103,93 @@ def test_parse_json():
     parsed = recommender_module.parse_json(data)
     assert isinstance(parsed, dict)
 
+def test_get_recommended_products_returns_records(engine):
+    recs = engine.get_recommended_products("user1", n_recommendations=3)
+    assert all(isinstance(r, dict) for r in recs)
+    assert "p1" not in [r["_id"] for r in recs]
+
+def _dataframe_recommendations(engine, products_df, user_id, n_recommendations):
+    """The pre-catalog DataFrame implementation of get_recommended_products."""
+    interacted_product_ids = engine.get_user_interactions(user_id)
+    preferred_categories = engine.get_user_preferences(user_id)
+
+    category_recommendations = []
+    if preferred_categories:
+        filtered_df = products_df[
+            (products_df["category"].isin(preferred_categories))
+            & (~products_df["_id"].isin(interacted_product_ids))
+        ]
+        category_recommendations = filtered_df.sort_values(
+            "rating", ascending=False
+        ).to_dict("records")
+
+    similar_users_product_ids = []
+    for similar_user in engine.get_similar_users(user_id):
+        similar_users_product_ids.extend(engine.get_user_interactions(similar_user["user_id"]))
+    most_common_products = [
+        product_id
+        for product_id, count in Counter(similar_users_product_ids).most_common()
+        if product_id not in interacted_product_ids
+    ]
+    combined = [
+        product
+        for product in products_df.to_dict("records")
+        if product["_id"] in most_common_products
+    ]
 
+    for product in category_recommendations:
+        if len(combined) >= n_recommendations:
+            break
+        if not any(r["_id"] == product["_id"] for r in combined):
+            combined.append(product)
+
+    if len(combined) < n_recommendations:
+        popular_df = products_df.sort_values("rating", ascending=False)
+        cutoff = int(len(popular_df) * 0.8)
+        for product in popular_df.iloc[:cutoff].sample(frac=1).to_dict("records"):
+            if len(combined) >= n_recommendations:
+                break
+            if (
+                not any(r["_id"] == product["_id"] for r in combined)
+                and product["_id"] not in interacted_product_ids
+            ):
+                combined.append(product)
+
+    return combined[:n_recommendations]
+
+def test_get_recommended_products_matches_dataframe_path():
+    with open(INIT_DATA) as f:
+        data = json.load(f)
+    engine = recommender_module.RecommendationEngine.from_records(
+        data["products"], data["users"], data["interactions"]
+    )
+    products_df = pd.DataFrame(data["products"])
+
+    # Includes a user with no history, who relies entirely on the popular fallback
+    user_ids = [user["_id"] for user in data["users"]] + ["new_user"]
+    engine.users_df = pd.concat(
+        [engine.users_df, pd.DataFrame([{"_id": "new_user", "preferences": []}])],
+        ignore_index=True,
+    )
+    for user_id in user_ids:
+        for n in (1, 5, 10):
+            np.random.seed(7)
+            expected = _dataframe_recommendations(engine, products_df, user_id, n)
+            np.random.seed(7)
+            actual = engine.get_recommended_products(user_id, n)
+            assert actual == expected, (user_id, n)
+
+def test_from_records_runs_subclass_init():
+    class TunedEngine(recommender_module.RecommendationEngine):
+        def __init__(self, *args, **kwargs):
+            self.boost = 2.0
+            super().__init__(*args, **kwargs)
+
+    engine = TunedEngine.from_records(
+        [{"_id": "p1", "name": "Phone", "category": "Electronics", "rating": 4.5, "price": 500}],
+        [{"_id": "user1", "preferences": ["Electronics"]}],
+        [],
+    )
+    assert isinstance(engine, TunedEngine)
+    assert engine.boost == 2.0
+    assert len(engine.catalog) == 1